@@ -4,15 +4,36 @@
 """Quack!!"""
 
 import argparse
+import collections
+import errno
+import fnmatch
+import functools
+import hashlib
 import os
+import pathlib
+import shlex
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import git
 import yaml
 from git import Repo
 
-_ARGS = None
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml.
+    from yaml import SafeLoader as _YamlLoader
+
+_ROOT_REPO = None
+_MODULES_PREFIX = '.quack/modules'
+_DEPENDENCY_JOBS = 8
+_QUACK_TEMPLATE = """name: {name}
+modules:
+profiles:
+  init:
+    tasks: ['modules']
+"""
 
 
 def _setup():
@@ -28,117 +49,363 @@ def _setup():
 
 def _remove_dir(directory):
     """Remove directory."""
-    if os.path.exists(directory):
+    try:
         shutil.rmtree(directory)
         return True
-    return False
+    except FileNotFoundError:
+        return False
 
 
 def _create_dir(directory):
     """Create directory."""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
+    os.makedirs(directory, exist_ok=True)
+
+
+def _root_repo():
+    """Return project git repository, opened once per run."""
+    global _ROOT_REPO
+    if _ROOT_REPO is None and os.path.isdir('.git'):
+        _ROOT_REPO = Repo('.')
+    return _ROOT_REPO
+
+
+def _strip_git_files(directory):
+    """Remove git metadata (.git*) from the given tree."""
+    for root, dirs, files in os.walk(directory):
+        for name in fnmatch.filter(dirs, '.git*'):
+            shutil.rmtree(os.path.join(root, name))
+            dirs.remove(name)
+        for name in fnmatch.filter(files, '.git*'):
+            os.remove(os.path.join(root, name))
+
+
+def _move_path(source, destination, cleaner=None):
+    """Move file / folder in place, copy if it cannot be renamed."""
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    try:
+        os.replace(source, destination)
+    except OSError as error:
+        if error.errno != errno.EXDEV:  # Only copy across devices.
+            raise
+        if os.path.isdir(source):
+            shutil.copytree(source, destination)
+            if cleaner:
+                cleaner.submit(shutil.rmtree, source, ignore_errors=True)
+            else:
+                _remove_dir(source)
+        else:
+            shutil.copyfile(source, destination)
+            os.remove(source)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_config_cached(yaml_path):
+    """Return parsed yaml configuration of given path."""
+    with open(yaml_path, 'rb') as file_pointer:
+        return yaml.load(file_pointer, Loader=_YamlLoader)
 
 
-def _get_config():
+def _get_config(yaml_file=None):
     """Return yaml configuration."""
-    yaml_file = (hasattr(_ARGS, 'yaml') and _ARGS.yaml) or 'quack.yaml'
+    yaml_file = yaml_file or 'quack.yaml'
     if os.path.isfile(yaml_file):
-        with open(yaml_file) as file_pointer:
-            return yaml.load(file_pointer, Loader=yaml.Loader)
+        return _get_config_cached(os.path.abspath(yaml_file))
     return
 
 
+def _module_error(module_path, module_cfg):
+    """Return configuration error of given module, if any."""
+    if not module_cfg.get('repository'):
+        return f'{module_path}: Please config a repository url'
+    tag = module_cfg.get('tag')
+    hexsha = module_cfg.get('hexsha')
+    if not module_cfg.get('branch') and tag is None and hexsha is None:
+        return f'{module_path}: must have at least branch or tag or hexsha'
+    if tag and hexsha:
+        return f'{module_path}: Cannot be both tag & hexsha.'
+    return
+
+
+def _fetch_one_module(module_path, module_cfg, cleaner=None):
+    """Fetch a single git submodule, return its path when fetched."""
+    error = _module_error(module_path, module_cfg)
+    if error:
+        print(error)
+        return
+    repo_url = module_cfg.get('repository')
+    chosen_branch = module_cfg.get('branch')
+    tag = module_cfg.get('tag')
+    hexsha = module_cfg.get('hexsha')
+    has_hexsha_config = hexsha is not None
+    has_tag_config = tag is not None
+
+    print('Cloning: ' + repo_url)
+    temp_cloned_path = os.path.join(_MODULES_PREFIX, module_path)
+    _remove_dir(temp_cloned_path)  # Leftover of a nested module.
+    clone_options = {'single_branch': True}
+    # A hexsha may be anywhere in history, so only go shallow if asked to.
+    depth = module_cfg.get('depth', None if has_hexsha_config else 1)
+    if depth:
+        clone_options['depth'] = depth
+    elif has_hexsha_config or has_tag_config:
+        # Keep history but fetch blobs on demand for the pinned tree only.
+        clone_options['multi_options'] = ['--filter=blob:none']
+        if has_hexsha_config:
+            clone_options['multi_options'].append('--no-checkout')
+    if tag:
+        clone_options['branch'] = tag
+    elif chosen_branch:
+        clone_options['branch'] = chosen_branch
+    # if not specific the branch, clone with the default branch
+    repo = Repo.clone_from(
+        url=repo_url,
+        to_path=temp_cloned_path,
+        **clone_options)
+
+    path = module_cfg.get('path', '')
+    from_path = os.path.join(temp_cloned_path, path)
+    if tag:
+        tag = ' (' + tag + ') '
+    elif hexsha:
+        repo.git.checkout('--quiet', hexsha)
+        hexsha = ' (' + hexsha + ')'
+    else:
+        hexsha = ' (' + repo.head.commit.hexsha + ')'
+
+    is_exists = os.path.exists(from_path)
+    if (path and is_exists) or not path:
+        if not module_cfg.get('isfile'):
+            _remove_dir(module_path)
+            if has_hexsha_config or has_tag_config:
+                _strip_git_files(from_path)
+        _move_path(from_path, module_path, cleaner)
+    elif not is_exists:
+        print(f'{path} folder does not exists. Skipped.')
+        _remove_dir(temp_cloned_path)
+        return
+
+    print('Cloned: ' + module_path + (tag or hexsha))
+    return module_path
+
+
+def _checkout_module(repo, commit, module_path, module_cfg, work_tree,
+                     cleaner=None):
+    """Check out module path of given commit, return True if found."""
+    path = module_cfg.get('path').strip('/')
+    try:
+        item = commit.tree / path
+    except KeyError:
+        return False
+    # Created with makedirs so the moved module follows the umask.
+    os.makedirs(work_tree)
+    # Private index, the shared repository is reused by other modules.
+    env = {'GIT_INDEX_FILE': work_tree + '.index'}
+    try:
+        if item.type == 'tree':
+            # read-tree fetches all missing blobs of the subtree in one batch.
+            repo.git(work_tree=work_tree).read_tree(
+                '-u', '--reset', f'{commit.hexsha}:{path}', env=env)
+            from_path = work_tree
+        else:
+            repo.git(work_tree=work_tree).checkout(
+                commit.hexsha, '--', path, env=env)
+            from_path = os.path.join(work_tree, path)
+        if not module_cfg.get('isfile'):
+            _remove_dir(module_path)
+            if module_cfg.get('hexsha') or module_cfg.get('tag'):
+                _strip_git_files(from_path)
+        _move_path(from_path, module_path, cleaner)
+    finally:
+        _remove_dir(work_tree)
+        try:
+            os.remove(env['GIT_INDEX_FILE'])
+        except FileNotFoundError:
+            pass
+    return True
+
+
+def _fetch_module_group(repo_url, group, cleaner=None):
+    """Fetch modules sharing a repository, return fetched paths and error."""
+    if len(group) == 1:
+        return [_fetch_one_module(*group[0], cleaner)], None
+    print('Cloning: ' + repo_url)
+    cache_path = os.path.join(
+        _MODULES_PREFIX, hashlib.sha1(repo_url.encode()).hexdigest())
+    # git runs inside the shared repository, so paths must be absolute.
+    work_trees = os.path.abspath(cache_path + '.checkout')
+    # Empty repository, each module fetches only its own ref.
+    repo = Repo.init(cache_path, bare=True)
+    fetched = []
+    failure = None
+    try:
+        repo.create_remote('origin', repo_url)
+        for index, (module_path, module_cfg) in enumerate(group):
+            tag = module_cfg.get('tag')
+            hexsha = module_cfg.get('hexsha')
+            branch = module_cfg.get('branch')
+            # Only a full object id can be fetched directly, an abbreviated
+            # one is resolved from its branch (or the default branch).
+            is_short_hexsha = hexsha is not None and len(str(hexsha)) < 40
+            if tag:
+                ref = 'refs/tags/' + tag
+            elif hexsha is not None and not is_short_hexsha:
+                ref = str(hexsha)
+            else:
+                ref = 'refs/heads/' + branch if branch else 'HEAD'
+            fetch_options = ['--no-tags', '--filter=blob:none']
+            depth = module_cfg.get('depth', None if hexsha is not None else 1)
+            if depth:
+                fetch_options.append(f'--depth={depth}')
+            try:
+                repo.git.fetch(*fetch_options, 'origin', ref)
+                revision = 'FETCH_HEAD'
+                if is_short_hexsha:
+                    revision = repo.git.rev_parse(
+                        '--verify', f'{hexsha}^{{commit}}')
+            except git.GitCommandError as error:
+                print(f'{module_path}: Cannot fetch {hexsha or ref}.')
+                failure = failure or error
+                continue
+            commit = repo.commit(revision)
+            try:
+                is_found = _checkout_module(
+                    repo, commit, module_path, module_cfg,
+                    os.path.join(work_trees, str(index)), cleaner)
+            except (git.GitCommandError, OSError) as error:
+                print(f'{module_path}: {error}')
+                failure = failure or error
+                continue
+            if not is_found:
+                path = module_cfg.get('path')
+                print(f'{path} folder does not exists. Skipped.')
+                continue
+            revision = ' (' + tag + ') ' if tag else (
+                ' (' + commit.hexsha + ')')
+            print('Cloned: ' + module_path + revision)
+            fetched.append(module_path)
+    finally:
+        repo.close()
+        _remove_dir(work_trees)
+        if cleaner:
+            cleaner.submit(shutil.rmtree, cache_path, ignore_errors=True)
+        else:
+            _remove_dir(cache_path)
+    return fetched, failure
+
+
+def _fetch_module_chain(modules, cleaner=None):
+    """Fetch modules one after another, return fetched paths and error."""
+    fetched = []
+    failure = None
+    for module_path, module_cfg in modules:
+        try:
+            if _fetch_one_module(module_path, module_cfg, cleaner):
+                fetched.append(module_path)
+        except (git.GitCommandError, OSError) as error:
+            print(f'{module_path}: {error}')
+            failure = failure or error
+    return fetched, failure
+
+
+def _nested_module_paths(module_paths):
+    """Return module paths containing, or contained in, another one."""
+    prefixes = {
+        module_path: os.path.normpath(module_path) + os.sep
+        for module_path in module_paths}
+    nested = set()
+    for module_path, prefix in prefixes.items():
+        for other_path, other_prefix in prefixes.items():
+            if module_path != other_path and other_prefix.startswith(prefix):
+                nested.update((module_path, other_path))
+    return nested
+
+
 def _fetch_modules(config, specific_module=None):
     """Fetch git submodules."""
     module_list = config.get('modules')
     if not module_list:
         print('No modules found.')
         return
-    modules = '.quack/modules'
-    ignore_list = []
-    _remove_dir(os.path.join(modules, ''))
-    _remove_dir('.git/modules/')
-    _create_dir(modules)
-    if config.get('gitignore') and os.path.isfile('.gitignore'):
-        with open('.gitignore', 'r') as file_pointer:
-            ignore_list = list(set(file_pointer.read().split('\n')))
-
-    for module in module_list.items():
-        module_path = module[0]
-        if specific_module and specific_module != module_path:
-            continue
-        repo_url = module[1].get('repository')
-        if not repo_url:
-            print(f'{module_path}: Please config a repository url')
-            continue
-        chosen_branch = module[1].get('branch')
-        tag = module[1].get('tag')
-        hexsha = module[1].get('hexsha')
-        has_hexsha_config = hexsha is not None
-        has_tag_config = tag is not None
-
-        if not chosen_branch and not has_hexsha_config and not has_tag_config:
-            print(f'{module_path}: must have at least branch or tag or hexsha')
-            continue
-
-        if tag and hexsha:
-            print(f'{module_path}: Cannot be both tag & hexsha.')
+    pending = [
+        module for module in module_list.items()
+        if not specific_module or specific_module == module[0]]
+    if not pending:
+        print(f'{specific_module}: No such module found.')
+        return
+    has_gitignore_cfg = bool(config.get('gitignore'))
+    if specific_module:
+        _remove_dir(os.path.join(_MODULES_PREFIX, specific_module))
+        _remove_dir(os.path.join('.git/modules', specific_module))
+    else:
+        _remove_dir(_MODULES_PREFIX)
+        _remove_dir('.git/modules/')
+    _create_dir(_MODULES_PREFIX)
+    # Workers only write below module paths, so one listing serves the run.
+    root_files = {
+        entry.name for entry in os.scandir('.') if entry.is_file()}
+    ignore_set = set()
+    if has_gitignore_cfg and '.gitignore' in root_files:
+        ignore_set = set(pathlib.Path('.gitignore').read_text().splitlines())
+
+    # Nested modules (e.g. vendor, vendor/lib) would race on the same
+    # folders, so they are fetched one after another in config order.
+    nested = _nested_module_paths(module[0] for module in pending)
+    chain = [module for module in pending if module[0] in nested]
+    # Modules taking a path out of the same repository share one clone.
+    groups = {}
+    for module_path, module_cfg in pending:
+        if module_path in nested:
             continue
-
-        print('Cloning: ' + repo_url)
-        temp_cloned_path = os.path.join(modules, module_path)
-        if chosen_branch:
-            repo = Repo.clone_from(
-                url=repo_url,
-                to_path=temp_cloned_path,
-                single_branch=True,
-                branch=chosen_branch)
-        else:  # if not specific the branch, clone with the default branch
-            repo = Repo.clone_from(
-                url=repo_url,
-                to_path=temp_cloned_path,
-                single_branch=True)
-
-        path = module[1].get('path', '')
-        from_path = os.path.join(modules, module_path, path)
-        if tag:
-            subprocess.call(['git', 'checkout', '--quiet', 'tags/' + tag], cwd=from_path)
-            tag = ' (' + tag + ') '
-        elif hexsha:
-            subprocess.call(['git', 'checkout', '--quiet', hexsha], cwd=from_path)
-            hexsha = ' (' + hexsha + ')'
-        else:
-            hexsha = ' (' + repo.head.commit.hexsha + ')'
-
-        is_exists = os.path.exists(from_path)
-        if (path and is_exists) or not path:
-            if module[1].get('isfile'):
-                if os.path.isfile(module_path):
-                    os.remove(module_path)
-                shutil.copyfile(from_path, module_path)
-            else:
-                _remove_dir(module_path)
-                if has_hexsha_config or has_tag_config:
-                    shutil.copytree(from_path, module_path, ignore=shutil.ignore_patterns('.git*'))
-                else:
-                    shutil.copytree(from_path, module_path)
-        elif not is_exists:
-            print(f'{path} folder does not exists. Skipped.')
-
-        # Remove temporary cloned repo.
-        _remove_dir(from_path)
-        if os.path.isfile('.gitmodules'):
-            subprocess.call('rm .gitmodules'.split())
-            subprocess.call('git rm --quiet --cached .gitmodules'.split())
-
-        print('Cloned: ' + module_path + (tag or hexsha))
-
-        if config.get('gitignore'):
-            with open('.gitignore', 'a') as file_pointer:
-                if module_path not in ignore_list:
-                    file_pointer.write('\n' + module_path)
-                    ignore_list.append(module_path)
+        key = module_path
+        if module_cfg.get('path') and not _module_error(
+                module_path, module_cfg):
+            key = module_cfg.get('repository')
+        groups.setdefault(key, []).append((module_path, module_cfg))
+
+    new_ignores = []
+    failures = []
+    jobs = max(1, int(config.get('jobs') or 8))
+    # Leftover copies are removed in the background, joined on exit.
+    with ThreadPoolExecutor(max_workers=1) as cleaner, \
+            ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_fetch_module_group, key, group, cleaner): key
+            for key, group in groups.items()}
+        if chain:
+            futures[executor.submit(_fetch_module_chain, chain, cleaner)] = (
+                ', '.join(module[0] for module in chain))
+        for future in as_completed(futures):
+            if future.exception():
+                print(f'{futures[future]}: {future.exception()}')
+                failures.append(future.exception())
+            elif future.result()[1]:
+                failures.append(future.result()[1])
+
+    fetched = set()
+    for future in futures:
+        if not future.exception():
+            fetched.update(future.result()[0])
+    # Config order keeps .gitignore stable between runs.
+    for module_path, _ in pending:
+        if module_path in fetched and module_path not in ignore_set:
+            new_ignores.append(module_path)
+            ignore_set.add(module_path)
+
+    # Runs even if a module failed, to cover the ones already in place.
+    if '.gitmodules' in root_files:
+        os.remove('.gitmodules')
+        root_repo = _root_repo()
+        if root_repo:
+            try:
+                root_repo.git.rm('--quiet', '--cached', '.gitmodules')
+            except git.GitCommandError:
+                pass  # .gitmodules was never tracked.
+
+    if has_gitignore_cfg and new_ignores:
+        with open('.gitignore', 'a') as file_pointer:
+            file_pointer.write('\n' + '\n'.join(new_ignores))
+    if failures:
+        raise failures[0]
 
 
 def _clean_modules(config, specific_module=None):
@@ -150,28 +417,97 @@ def _clean_modules(config, specific_module=None):
             print('Cleaned', module[0])
 
 
-def _run_nested_quack(dependency):
-    """Execute all required dependencies."""
+def _nested_quack_command(quack):
+    """Return module and command of given nested quack."""
+    module, _, rest = quack.rpartition('/')
+    yaml_name, has_yaml, profile_name = rest.partition(':')
+    if not has_yaml:  # Only profile name is given.
+        yaml_name, profile_name = '', yaml_name
+    command = ['quack']
+    if profile_name:
+        command += ['-p', profile_name]
+    if yaml_name:
+        command += ['-y', yaml_name]
+    return module or '.', command
+
+
+def _start_nested_quack(dependency, capture_output=False):
+    """Start nested quack, return its process and temporary git folder."""
     if not dependency or dependency[0] != 'quack':
         return
-    quack = dependency[1]
-    slash_index = quack.rfind('/')
-    command = ['quack']
-    module = '.'
-    if slash_index > 0:
-        module = quack[:slash_index]
-    colon_index = quack.find(':')
-    if len(quack) > colon_index + 1:
-        command.append('-p')
-        command.append(quack[colon_index + 1: len(quack)])
-    if colon_index > 0:
-        command.append('-y')
-        command.append(quack[slash_index + 1:colon_index])
+    module, command = _nested_quack_command(dependency[1])
     print('Quack..' + module)
-    git.Repo.init(module)
-    subprocess.call(command, cwd=module)
-    _remove_dir(module + '/.git')
-    return True
+    git_dir = os.path.join(module, '.git')
+    is_temp_repo = not os.path.isdir(git_dir)
+    if is_temp_repo:
+        git.Repo.init(module)
+    output = subprocess.PIPE if capture_output else None
+    try:
+        process = subprocess.Popen(
+            command, cwd=module, stdout=output,
+            stderr=output and subprocess.STDOUT, universal_newlines=True)
+    except OSError:  # e.g. quack is not on PATH.
+        if is_temp_repo:
+            _remove_dir(git_dir)
+        raise
+    return process, git_dir if is_temp_repo else None
+
+
+def _wait_nested_quack(process, temp_git_dir=None):
+    """Wait for nested quack, print captured output and clean up."""
+    output, _ = process.communicate()
+    if output:
+        print(output, end='')
+    if temp_git_dir:
+        _remove_dir(temp_git_dir)
+    return process
+
+
+def _run_nested_quack(dependency):
+    """Execute all required dependencies."""
+    started = _start_nested_quack(dependency)
+    if not started:
+        return
+    return _wait_nested_quack(*started)
+
+
+def _handle_modules(config, module, is_negate):
+    """Fetch or clean (negate) modules."""
+    if is_negate:
+        _clean_modules(config, module)
+    else:
+        _fetch_modules(config, module)
+
+
+def _handle_quack(_config, quack, _is_negate):
+    """Run nested quack task."""
+    _run_nested_quack(('quack', quack))
+
+
+def _handle_cmd(_config, argv, _is_negate):
+    """Run command task."""
+    subprocess.run(argv, check=False)
+
+
+# Task prefix, handler and payload parser.
+_TASK_DISPATCH = (
+    ('quack:', _handle_quack, str),
+    ('cmd:', _handle_cmd, shlex.split),
+    ('modules:', _handle_modules, str),
+)
+
+
+def _parse_task(command):
+    """Return task handler, payload and negate flag of given task."""
+    is_negate = command[0] == '-'
+    if is_negate:
+        command = command[1:]
+    if command == 'modules':
+        return _handle_modules, None, is_negate
+    for prefix, handler, parse in _TASK_DISPATCH:
+        if command.startswith(prefix):
+            return handler, parse(command[len(prefix):]), is_negate
+    return None, None, is_negate
 
 
 def _run_tasks(config, profile):
@@ -179,35 +515,29 @@ def _run_tasks(config, profile):
     dependencies = profile.get('dependencies', {})
     stats = {'tasks': 0, 'dependencies': 0}
     if isinstance(dependencies, dict):
-        for dependency in profile.get('dependencies', {}).items():
-            _run_nested_quack(dependency)
-            stats['dependencies'] += 1
+        # Keep up to _DEPENDENCY_JOBS nested quacks running, drain output
+        # in order, and wait for every started one even if a start fails.
+        running = collections.deque()
+        try:
+            for dependency in dependencies.items():
+                if len(running) == _DEPENDENCY_JOBS:
+                    _wait_nested_quack(*running.popleft())
+                started = _start_nested_quack(dependency, capture_output=True)
+                if started:
+                    running.append(started)
+        finally:
+            while running:
+                _wait_nested_quack(*running.popleft())
+        stats['dependencies'] = len(dependencies)
     tasks = profile.get('tasks', [])
     if not tasks:
         print('No tasks found.')
         return stats
-    for command in tasks:
+    # Parse every task first, so a malformed task fails before any runs.
+    for handler, payload, is_negate in [_parse_task(task) for task in tasks]:
         stats['tasks'] += 1
-        is_negate = command[0] == '-'
-        if is_negate:
-            command = command[1:]
-        module = None
-        is_modules = command.find('modules:') == 0 or 'modules' == command
-        is_quack = command.find('quack:') == 0
-        is_cmd = command.find('cmd:') == 0
-
-        if is_modules and command != 'modules':
-            module = command.replace('modules:', '')
-        elif is_quack:
-            _run_nested_quack(('quack', command.replace('quack:', '')))
-        elif is_cmd:
-            cmd = command.replace('cmd:', '')
-            subprocess.call(cmd.split())
-
-        if is_modules and not is_negate:
-            _fetch_modules(config, module)
-        elif is_modules and is_negate:
-            _clean_modules(config, module)
+        if handler:
+            handler(config, payload, is_negate)
     return stats
 
 
@@ -218,36 +548,31 @@ def _prompt_to_create():
         'No quack configuration found, do you want to create one? (y/N): ')
     if yes_or_no.lower() == 'y':
         project_name = prompt('Provide project name: ')
-        with open('quack.yaml', 'a') as file_pointer:
-            file_pointer.write(f"""name: {project_name}
-modules:
-profiles:
-  init:
-    tasks: ['modules']""")
-        return _get_config()
+        try:
+            with open('quack.yaml', 'x') as file_pointer:
+                file_pointer.write(_QUACK_TEMPLATE.format(name=project_name))
+        except FileExistsError:
+            print('quack.yaml already exists.')
+            return
+        return _get_config('quack.yaml')
     return
 
 
-def main():
+def main(args=None):
     """Entry point."""
-    global _ARGS
     _create_dir('.quack')
-    if _ARGS is None:
-        _ARGS = _setup()
-    config = _get_config()
+    if args is None:
+        args = _setup()
+    config = _get_config(args.yaml)
     if not config:
         config = _prompt_to_create()
         if not config:
             return
-    if not _ARGS.profile:
-        _ARGS.profile = 'init'
-    profile = config.get('profiles', {}).get(_ARGS.profile, {})
-    # print(_ARGS.profile, profile)
+    profile = config.get('profiles', {}).get(args.profile or 'init', {})
     stats = _run_tasks(config, profile)
     print('%s task(s) completed with %s dependencies.' % (
         stats['tasks'], stats['dependencies']))
 
 
 if __name__ == '__main__':
-    _ARGS = _setup()
     main()
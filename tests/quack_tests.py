@@ -2,6 +2,11 @@
 # pylint: disable=W0212
 
 import os
+import stat
+import subprocess
+
+import git
+import pytest
 from quack import quack
 
 
@@ -15,11 +20,168 @@ def test_create_dir():
     assert not os.path.exists('qt')
 
 
+def test_move_path():
+    """Move tree without git metadata."""
+    quack._create_dir('qt/src/.git')
+    quack._create_dir('qt/src/sub')
+    with open('qt/src/sub/.gitignore', 'w') as file_pointer:
+        file_pointer.write('*.pyc')
+    with open('qt/src/sub/module.py', 'w') as file_pointer:
+        file_pointer.write('')
+    quack._strip_git_files('qt/src')
+    quack._move_path('qt/src', 'qt/vendor/dest')
+    assert not os.path.exists('qt/src')
+    assert os.path.isfile('qt/vendor/dest/sub/module.py')
+    assert not os.path.exists('qt/vendor/dest/.git')
+    assert not os.path.exists('qt/vendor/dest/sub/.gitignore')
+    quack._remove_dir('qt')
+
+
+def _commit_upstream(upstream, files, message='quack'):
+    """Commit files to a local upstream repository, return its hexsha."""
+    if not os.path.isdir(upstream):
+        subprocess.check_call(['git', 'init', '-q', '-b', 'main', upstream])
+    for name, content in files.items():
+        file_path = os.path.join(upstream, name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file_pointer:
+            file_pointer.write(content)
+    subprocess.check_call(['git', 'add', '.'], cwd=upstream)
+    subprocess.check_call([
+        'git', '-c', 'user.name=quack', '-c', 'user.email=quack@quack',
+        'commit', '-qm', message], cwd=upstream)
+    return subprocess.check_output(
+        ['git', 'rev-parse', 'HEAD'], cwd=upstream).decode().strip()
+
+
+def _read(file_path):
+    """Return content of given file."""
+    with open(file_path) as file_pointer:
+        return file_pointer.read()
+
+
+def test_fetch_shared_repository_modules(tmp_path, monkeypatch):
+    """Test on path modules sharing one repository."""
+    upstream = str(tmp_path / 'upstream')
+    first_sha = _commit_upstream(upstream, {
+        'lib/module.py': 'v1', 'lib/.gitignore': '*.pyc',
+        'lib/test_module.py': '', 'lib/ver.py': 'v=$Format:%H$',
+        '.gitattributes': 'test_*.py export-ignore\nver.py export-subst',
+        'tool.py': 'tool'})
+    subprocess.check_call(['git', 'tag', 'v1.0'], cwd=upstream)
+    _commit_upstream(upstream, {'lib/module.py': 'v2'})
+    url = 'file://' + upstream
+    config = {'gitignore': True, 'modules': {
+        'lib': {'repository': url, 'path': 'lib', 'branch': 'main'},
+        'pinned': {'repository': url, 'path': 'lib', 'tag': 'v1.0'},
+        'short': {'repository': url, 'path': 'lib', 'hexsha': first_sha[:8]},
+        'tool.py': {
+            'repository': url, 'path': 'tool.py', 'isfile': True,
+            'branch': 'main'}}}
+    (tmp_path / 'project').mkdir()
+    monkeypatch.chdir(tmp_path / 'project')
+    quack._fetch_modules(config)
+    assert _read('lib/module.py') == 'v2'
+    assert _read('lib/ver.py') == 'v=$Format:%H$'
+    assert os.path.isfile('lib/test_module.py')
+    assert os.path.isfile('lib/.gitignore')
+    assert _read('pinned/module.py') == 'v1'
+    assert not os.path.exists('pinned/.gitignore')
+    assert _read('short/module.py') == 'v1'
+    assert _read('tool.py') == 'tool'
+    assert _read('.gitignore').split() == [
+        'lib', 'pinned', 'short', 'tool.py']
+    assert os.listdir('.quack/modules') == []
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat('lib').st_mode) == 0o777 & ~umask
+    # Fetched siblings of a failing module are still ignored.
+    os.remove('.gitignore')
+    config['modules']['lib']['branch'] = 'missing'
+    with pytest.raises(git.GitCommandError):
+        quack._fetch_modules(config)
+    assert _read('.gitignore').split() == ['pinned', 'short', 'tool.py']
+
+
+def test_fetch_single_modules(tmp_path, monkeypatch):
+    """Test on modules cloned from their own repository."""
+    upstream = str(tmp_path / 'upstream')
+    first_sha = _commit_upstream(upstream, {
+        'version.py': 'v1', '.gitignore': '*.pyc'})
+    subprocess.check_call(['git', 'tag', 'v1.0'], cwd=upstream)
+    second_sha = _commit_upstream(upstream, {'version.py': 'v2'})
+    _commit_upstream(upstream, {'version.py': 'v3'})
+    url = 'file://' + upstream
+    config = {'modules': {
+        'branch': {'repository': url, 'branch': 'main'},
+        'history': {'repository': url, 'branch': 'main', 'depth': 0},
+        'tagged': {'repository': url, 'tag': 'v1.0'},
+        'pinned': {'repository': url, 'hexsha': second_sha},
+        'short': {'repository': url, 'hexsha': first_sha[:8]},
+        'history_tag': {'repository': url, 'tag': 'v1.0', 'depth': 0}}}
+    (tmp_path / 'project').mkdir()
+    monkeypatch.chdir(tmp_path / 'project')
+    quack._fetch_modules(config)
+    assert _read('branch/version.py') == 'v3'
+    assert os.path.isfile('branch/.git/shallow')
+    assert _read('history/version.py') == 'v3'
+    assert not os.path.exists('history/.git/shallow')
+    assert git.Repo('history').git.rev_list('--count', 'HEAD') == '3'
+    for module_path, version in (
+            ('tagged', 'v1'), ('pinned', 'v2'), ('short', 'v1'),
+            ('history_tag', 'v1')):
+        assert _read(os.path.join(module_path, 'version.py')) == version
+        assert not os.path.exists(os.path.join(module_path, '.git'))
+        assert not os.path.exists(os.path.join(module_path, '.gitignore'))
+
+
+def test_fetch_nested_modules(tmp_path, monkeypatch):
+    """Test on module paths nested in each other."""
+    assert quack._nested_module_paths(
+        ['vendor', 'vendor/lib', 'vendors', 'tools/']) == {
+            'vendor', 'vendor/lib'}
+    outer = str(tmp_path / 'outer')
+    inner = str(tmp_path / 'inner')
+    _commit_upstream(outer, {'pkg/outer.py': 'outer'})
+    _commit_upstream(inner, {'lib/inner.py': 'inner'})
+    config = {'modules': {
+        'vendor': {
+            'repository': 'file://' + outer, 'path': 'pkg',
+            'branch': 'main'},
+        'vendor/lib': {
+            'repository': 'file://' + inner, 'path': 'lib',
+            'branch': 'main'},
+        'vendors': {
+            'repository': 'file://' + inner, 'path': 'lib',
+            'branch': 'main'}}}
+    (tmp_path / 'project').mkdir()
+    monkeypatch.chdir(tmp_path / 'project')
+    for _ in range(3):
+        quack._fetch_modules(config)
+        assert _read('vendor/outer.py') == 'outer'
+        assert _read('vendor/lib/inner.py') == 'inner'
+        assert _read('vendors/inner.py') == 'inner'
+
+
 def test_get_config():
     """Test on Get configuration."""
     assert isinstance(quack._get_config(), dict)
 
 
+def test_parse_task():
+    """Test on task parsing."""
+    assert quack._parse_task('modules') == (
+        quack._handle_modules, None, False)
+    assert quack._parse_task('-modules:lib') == (
+        quack._handle_modules, 'lib', True)
+    assert quack._parse_task('quack:lib/build.yaml:update') == (
+        quack._handle_quack, 'lib/build.yaml:update', False)
+    assert quack._parse_task('cmd:echo "quack quack"') == (
+        quack._handle_cmd, ['echo', 'quack quack'], False)
+    assert quack._parse_task('cmd:echo quack:cmd:') == (
+        quack._handle_cmd, ['echo', 'quack:cmd:'], False)
+
+
 def test_run_tasks_cmd():
     """Test on run command task."""
     config = quack._get_config()
@@ -34,6 +196,36 @@ def test_run_with_dependencies():
     assert quack._run_tasks(config, profile)['dependencies'] == 1
 
 
+def test_nested_quack_command():
+    """Test on nested quack parsing."""
+    assert quack._nested_quack_command('lib/build.yaml:update') == (
+        'lib', ['quack', '-p', 'update', '-y', 'build.yaml'])
+    assert quack._nested_quack_command('lib/build.yaml:') == (
+        'lib', ['quack', '-y', 'build.yaml'])
+    assert quack._nested_quack_command('update') == (
+        '.', ['quack', '-p', 'update'])
+
+
+def test_run_tasks_waits_started_dependencies(monkeypatch):
+    """Test on dependencies started before a failing one."""
+    started_list = []
+    start_nested_quack = quack._start_nested_quack
+
+    def start_or_fail(dependency, capture_output=False):
+        if dependency[0] != 'quack':
+            raise FileNotFoundError('quack')
+        started_list.append(start_nested_quack(dependency, capture_output))
+        return started_list[-1]
+
+    monkeypatch.setattr(quack, '_start_nested_quack', start_or_fail)
+    profile = {'dependencies': {'quack': 'nested_quack_test', 'fail': ''}}
+    with pytest.raises(FileNotFoundError):
+        quack._run_tasks({}, profile)
+    process, temp_git_dir = started_list[0]
+    assert process.returncode is not None
+    assert not os.path.exists(temp_git_dir)
+
+
 def test_run_nested_quack():
     """Test on nested quack."""
     assert quack._run_nested_quack(('quack', 'nested_quack_test'))